@@ -434,7 +434,7 @@ async def updateAutodiscoverySettings(
 @app.post("/v1/discover", summary="Send a SSP discover request for new ESP Devices")
 async def discoverDevices() -> CommandResponse:
     ml.slog(f"User sent device discover command")
-    deviceTools.sendDiscoveryBroadcast()
+    await deviceTools.sendDiscoveryBroadcast()
     return CommandResponse(
         status="sent",
         message="Discovery broadcast sent. Devices will auto-connect.",
@@ -443,9 +443,7 @@ async def discoverDevices() -> CommandResponse:
 
 @app.post("/v1/estop", summary="Emergency stop - stops all streaming and control commands immediately")
 async def emergencyStop() -> None:
-    devices = deviceTools.getRegisteredDevices()
-    for device in devices.values():
-        await deviceTools.emergencyStop(device)
+    await deviceTools.emergencyStopAll()
 
 
 class ConfigsResponse(BaseModel):
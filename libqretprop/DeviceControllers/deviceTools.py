@@ -1,15 +1,20 @@
 import asyncio
 import contextlib
-import csv
+import math
 import socket
+import sys
 import time
 
+import numpy as np
+import orjson
+
 import libqretprop.mylogging as ml
 from libqretprop.Devices.ESPDevice import ESPDevice
 from libqretprop.Devices.SensorMonitor import SensorMonitor
 from libqretprop.protocol import (
     HEADER_SIZE,
     AckPacket,
+    ClientReceivedPacket,
     ConfigPacket,
     ControlPacket,
     ControlState,
@@ -26,19 +31,43 @@ from libqretprop.protocol import (
 
 MULTICAST_ADDRESS = "239.255.255.250"
 MULTICAST_PORT = 1900
+SSDP_ADDRESS = (MULTICAST_ADDRESS, MULTICAST_PORT)
+
+# The discovery request never changes, so it is encoded once here rather than on every broadcast
+SSDP_REQUEST = (
+    "M-SEARCH * HTTP/1.1\r\n"
+    f"HOST: {MULTICAST_ADDRESS}:{MULTICAST_PORT}\r\n"
+    'MAN: "ssdp:discover"\r\n'
+    "MX: 2\r\n"
+    "ST: urn:qretprop:espdevice:1\r\n"
+    "USER-AGENT: QRET/1.0\r\n"
+    "\r\n"
+).encode()
 
 TCP_PORT = 50000
 UDP_PORT = 50001  # These wouldn't overlap but a different port number is useful for debugging
+TCP_BACKLOG = 128  # Pending connections the listener queues, so a whole stand powering on at once isn't refused
+TCP_KEEPALIVE_IDLE_S = 10  # Idle seconds before the kernel probes a silent device connection
+TCP_KEEPALIVE_INTERVAL_S = 5  # Seconds between unanswered probes
+TCP_KEEPALIVE_COUNT = 3  # Unanswered probes before the connection is dropped
+TCP_RX_BUFFER_SIZE = 65536  # Per-device receive buffer; holds any QLCP packet since the length field is 16 bits
+UDP_RCVBUF_SIZE = 4 * 1024 * 1024  # Kernel receive buffer requested for streamed DATA, capped by net.core.rmem_max
+SO_RCVBUFFORCE = getattr(socket, "SO_RCVBUFFORCE", 33)  # Linux only, not exported by the socket module
 
 AUTODISCOVER_ENABLED = True
 AUTODISCOVER_INTERVAL_S = 30.0  # seconds between SSDP discovery broadcasts
 
+CONFIG_TIMEOUT_S = 5.0  # seconds a newly connected device has to send its CONFIG packet
+CSV_CHUNK_ROWS = 10000  # rows formatted per write when exporting data
+
 # Searching Globals #
-ssdpSearchSocket: socket.socket | None = None
+ssdpTransport: asyncio.DatagramTransport | None = None
+_ssdpTransportLock = asyncio.Lock()  # Autodiscovery and CLI/API DISCOVER can race to create the transport
 
 # Listening Globals #
-tcpListenerSocket: socket.socket | None = None
 deviceRegistry: dict[str, ESPDevice] = {}
+deviceNameIndex: dict[str, list[ESPDevice]] = {}  # Same devices keyed by upper-cased name, kept in step with deviceRegistry
+onboardingIPs: set[str] = set()  # Devices whose CONFIG handshake is in progress
 
 
 # ---------------------- #
@@ -46,34 +75,33 @@ deviceRegistry: dict[str, ESPDevice] = {}
 # ---------------------- #
 
 
-def sendDiscoveryBroadcast() -> None:
-    global ssdpSearchSocket
+async def sendDiscoveryBroadcast() -> None:
+    global ssdpTransport
 
-    if ssdpSearchSocket is None:
-        ssdpSearchSocket = _createSSDPSocket()
+    # Sends go through a datagram transport so the event loop handles them (and any backpressure) like every other socket
+    async with _ssdpTransportLock:
+        if ssdpTransport is None or ssdpTransport.is_closing():
+            loop = asyncio.get_running_loop()
+            ssdpTransport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, sock=_createSSDPSocket())
 
     ml.dlog("Sending SSDP multicast discovery request.")
 
-    ssdpRequest = (
-        "M-SEARCH * HTTP/1.1\r\n"
-        f"HOST: {MULTICAST_ADDRESS}:{MULTICAST_PORT}\r\n"
-        'MAN: "ssdp:discover"\r\n'
-        "MX: 2\r\n"
-        "ST: urn:qretprop:espdevice:1\r\n"
-        "USER-AGENT: QRET/1.0\r\n"
-        "\r\n"
-    )
-
-    ssdpSearchSocket.sendto(ssdpRequest.encode(), (MULTICAST_ADDRESS, MULTICAST_PORT))
+    ssdpTransport.sendto(SSDP_REQUEST, SSDP_ADDRESS)
 
 
 async def autoDiscoveryLoop() -> None:
     """Periodically send SSDP discovery broadcasts every AUTODISCOVER_INTERVAL seconds."""
+    loop = asyncio.get_running_loop()
+    nextSend = loop.time()
+
     while True:
         if AUTODISCOVER_ENABLED:
-            sendDiscoveryBroadcast()
-            await asyncio.sleep(AUTODISCOVER_INTERVAL_S)
+            await sendDiscoveryBroadcast()
+            # Scheduled from the previous deadline rather than from when the send finished, so the period doesn't drift
+            nextSend = max(nextSend + AUTODISCOVER_INTERVAL_S, loop.time())
+            await asyncio.sleep(nextSend - loop.time())
         else:
+            nextSend = loop.time()  # Broadcast as soon as autodiscovery is re-enabled
             await asyncio.sleep(0.5)
 
 
@@ -102,163 +130,161 @@ def _createSSDPSocket() -> socket.socket:
 
 async def tcpListener() -> None:
     """Listen for incoming TCP connections from devices on port 50000."""
-    global deviceRegistry
-
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(("0.0.0.0", TCP_PORT))
-    server_socket.listen(5)
-    server_socket.setblocking(False)
+    # Only one listener is run since the device registry lives on this loop. SO_REUSEPORT is deliberately left off so a
+    # second server process fails with EADDRINUSE instead of silently taking half the device connections.
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(_DeviceConnection, "0.0.0.0", TCP_PORT, backlog=TCP_BACKLOG)
 
     ml.slog(f"TCP listener started on port {TCP_PORT}")
 
-    loop = asyncio.get_event_loop()
-
-    while True:
-        try:
-            client_socket, addr = await loop.sock_accept(server_socket)
-            client_socket.setblocking(False)
-            deviceIP = addr[0]
-
-            ml.slog(f"Accepted TCP connection from {deviceIP}")
-
-            # Read header first (9 bytes) to get packet length
-            import json
-
-            header_bytes = b""
-            while len(header_bytes) < HEADER_SIZE:
-                chunk = await loop.sock_recv(client_socket, HEADER_SIZE - len(header_bytes))
-                if not chunk:
-                    ml.elog(f"Device {deviceIP} disconnected during config.")
-                    client_socket.close()
-                    break
-                header_bytes += chunk
-            else:
-                packet_len = get_packet_len(header_bytes)
-                remaining = packet_len - HEADER_SIZE
-                payload_bytes = b""
-                while len(payload_bytes) < remaining:
-                    chunk = await loop.sock_recv(client_socket, remaining - len(payload_bytes))
-                    if not chunk:
-                        ml.elog(f"Device {deviceIP} disconnected during config payload.")
-                        client_socket.close()
-                        break
-                    payload_bytes += chunk
-                else:
-                    full_packet = header_bytes + payload_bytes
-                    packet = decode_packet_server(full_packet)
-
-                    if isinstance(packet, ConfigPacket):
-                        config_dict = json.loads(packet.config_json)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        ml.slog("TCP listener cancelled")
+        raise
 
-                        # If a device with the same IP is already registered, close the old connection before registering the new one
-                        # Prevents issues with devices rebooting and reconnecting before the disconnect is detected
-                        if deviceIP in deviceRegistry:
-                            ml.elog(f"Device {deviceIP} attempted to connect and is already registered. Closing old connection.")
-                            cleanupDevice(deviceRegistry[deviceIP])
-                            del deviceRegistry[deviceIP]
 
-                        if config_dict.get("device_type") in {"Sensor Monitor", "Simulated Sensor Monitor"}:
-                            newDevice = SensorMonitor(client_socket, deviceIP, config_dict)
-                        else:
-                            newDevice = ESPDevice(client_socket, deviceIP, config_dict)
+def _tuneDeviceSocket(sock: socket.socket) -> None:
+    """Set socket options for a device's TCP connection. asyncio already enables TCP_NODELAY."""
+    # Let the kernel notice ESP32s that drop off the network without closing the connection. The default probe timing
+    # waits two hours before the first probe, so it is shortened where the platform exposes it.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (
+        ("TCP_KEEPIDLE", TCP_KEEPALIVE_IDLE_S),
+        ("TCP_KEEPINTVL", TCP_KEEPALIVE_INTERVAL_S),
+        ("TCP_KEEPCNT", TCP_KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, option):
+            with contextlib.suppress(OSError):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
 
-                        deviceRegistry[deviceIP] = newDevice
 
-                        listenerTask = loop.create_task(_monitorSingleDevice(newDevice))
-                        deviceRegistry[deviceIP].listenerTask = listenerTask
+class _UDPDataProtocol(asyncio.DatagramProtocol):
+    """Receives DATA packets streamed from devices over UDP."""
 
-                        ml.slog(f"Device {newDevice.name} registered from {deviceIP}")
-                        ml.log(f"{newDevice.name} CONNECTED")  # Used by GUI to trigger device addition
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        try:
+            _handleUDPPacket(data, addr[0])
+        except Exception as e:
+            ml.elog(f"Error in UDP listener: {e}")
 
-                        # ACK the CONFIG, then send initial TIMESYNC
 
-                        ack = AckPacket.create(PacketType.CONFIG, packet.sequence)
-                        await loop.sock_sendall(client_socket, ack.encode())
+def _handleUDPPacket(data: bytes, deviceIP: str) -> None:
+    if deviceIP not in deviceRegistry:
+        ml.elog(f"Received UDP packet from unknown device {deviceIP}")
+        return
 
-                        timesync = SimplePacket.create(PacketType.TIMESYNC)
-                        await loop.sock_sendall(client_socket, timesync.encode())
-                        ml.plog(f"Sent initial TIMESYNC to {newDevice.name}")
+    device = deviceRegistry[deviceIP]
+    if not isinstance(device, SensorMonitor):
+        return
 
-                        status_request = SimplePacket.create(PacketType.STATUS_REQUEST)
-                        await loop.sock_sendall(client_socket, status_request.encode())
-                        ml.plog(f"Sent initial STATUS_REQUEST to {newDevice.name}")
+    packet = decode_packet_server(data)
+
+    if isinstance(packet, DataPacket):
+        timestamp_ms = packet.timestamp
+        readings = packet.readings
+        t = timestamp_ms / 1000.0 if device.last_sync_time is not None else time.monotonic()
+        sensor_names = device.sensor_names
+        sensor_data = device.sensor_data
+        sensor_count = len(sensor_data)
+        row = len(device.times)  # Every column is this long until the packet's sample is added
+        filled = 0
+        log_prefix = f"{device.name} {t:.3f} "  # Shared by every reading in the packet, so only formatted once
+
+        for reading in readings:
+            sid = reading.sensor_id
+            value = reading.value
+
+            # A repeated sensor id in one packet would push its column out of step with times, so only the first counts
+            if sid < sensor_count and len(sensor_data[sid]) == row:
+                sensor_data[sid].append(value)
+                filled += 1
+                ml.log(f"{log_prefix}{sensor_names[sid]}:{value:.2f}")
+
+        # Packets need not carry every sensor. Pad the missing ones with NaN so each column stays aligned with times.
+        if filled < sensor_count:
+            for column in sensor_data:
+                if len(column) == row:
+                    column.append(math.nan)
+        device.times.append(t)
+    else:
+        ml.elog(f"Received non-DATA packet over UDP from {device.name}. Ignoring.")
 
-        except asyncio.CancelledError:
-            ml.slog("TCP listener cancelled")
-            server_socket.close()
-            raise
-        except Exception as e:
-            ml.elog(f"Error in TCP listener: {e}")
-            await asyncio.sleep(0.1)
 
 async def udpListener() -> None:
     """Listen for incoming UDP packets from devices"""
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    _setReceiveBuffer(udp_socket, UDP_RCVBUF_SIZE)
     udp_socket.bind(("0.0.0.0", UDP_PORT))
-    udp_socket.setblocking(False)
 
-    ml.slog(f"UDP listener started on port {UDP_PORT}")
+    # The kernel silently caps SO_RCVBUF, so check what was actually granted. Linux doubles the requested size for
+    # bookkeeping overhead and reports the doubled value, so halve it to compare like with like.
+    granted = udp_socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    if sys.platform == "linux":
+        granted //= 2
+    if granted < UDP_RCVBUF_SIZE:
+        ml.elog(
+            f"UDP receive buffer capped at {granted} bytes (requested {UDP_RCVBUF_SIZE}). "
+            "Raise net.core.rmem_max or run with CAP_NET_ADMIN to avoid drops.",
+        )
+    else:
+        ml.dlog(f"UDP receive buffer set to {granted} bytes")
 
-    UDP_BATCH_SIZE = 128  # Max packets per event-loop tick before yielding to TCP/other tasks
+    # The datagram transport reads on the loop's readiness callbacks, which works on both asyncio and uvloop
+    # (uvloop does not implement loop.sock_recvfrom)
+    transport, _ = await loop.create_datagram_endpoint(_UDPDataProtocol, sock=udp_socket)
 
-    while True:
-        try:
-            data, addr = await loop.sock_recvfrom(udp_socket, 4096)
-
-            # Process first packet plus any already-buffered ones, up to UDP_BATCH_SIZE
-            # This prevents the UDP listener from blocking the event loop for too long if commands need to be processed
-            for _ in range(UDP_BATCH_SIZE):
-                deviceIP = addr[0]
-                if deviceIP in deviceRegistry:
-                    device = deviceRegistry[deviceIP]
-                    if isinstance(device, SensorMonitor):
-                        packet = decode_packet_server(data)
-
-                        if isinstance(packet, DataPacket):
-                            timestamp_ms = packet.timestamp
-                            readings = packet.readings
-                            t = timestamp_ms / 1000.0 if device.last_sync_time is not None else time.monotonic()
-                            sensor_names = device.sensor_names
-                            sensors = device.sensors
-
-                            for reading in readings:
-                                sid = reading.sensor_id
-                                value = reading.value
-
-                                if sid < len(sensor_names):
-                                    sensor_name = sensor_names[sid]
-                                    sensors[sensor_name].data.append(value)
-                                    ml.log(f"{device.name} {t:.3f} {sensor_name}:{value:.2f}")
-                            device.times.append(t)
-                        else:
-                            ml.elog(f"Received non-DATA packet over UDP from {device.name}. Ignoring.")
-                else:
-                    ml.elog(f"Received UDP packet from unknown device {deviceIP}")
+    ml.slog(f"UDP listener started on port {UDP_PORT}")
 
-                try:
-                    data, addr = udp_socket.recvfrom(4096)
-                except BlockingIOError:
-                    break
+    try:
+        await loop.create_future()  # Run until cancelled
+    except asyncio.CancelledError:
+        ml.slog("UDP listener cancelled")
+        transport.close()
+        raise
 
-            await asyncio.sleep(0)  # Yield to let other tasks run
 
-        except asyncio.CancelledError:
-            ml.slog("UDP listener cancelled")
-            udp_socket.close()
-            raise
-        except Exception as e:
-            ml.elog(f"Error in UDP listener: {e}")
-            await asyncio.sleep(0.1)
+def _setReceiveBuffer(sock: socket.socket, size: int) -> None:
+    """Request a receive buffer, bypassing net.core.rmem_max when the process has CAP_NET_ADMIN (Linux)."""
+    if sys.platform == "linux":
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, size)
+        except OSError:
+            pass  # Not permitted, fall back to the capped request
+        else:
+            return
+
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
 
 
 def getRegisteredDevices() -> dict[str, ESPDevice]:
     return deviceRegistry.copy()
 
 
+def getDeviceByName(name: str) -> ESPDevice | None:
+    """Look up a registered device by IP address, or by name ignoring case.
+
+    Boards flashed with the same firmware report the same name, so a name shared by several devices is ambiguous and
+    returns None rather than picking one. Use getDevicesByName to list them, and address them by IP instead.
+    """
+    device = deviceRegistry.get(name)
+    if device is not None:
+        return device
+
+    matches = deviceNameIndex.get(name.upper())
+    if matches is not None and len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def getDevicesByName(name: str) -> list[ESPDevice]:
+    """Return every registered device reporting this name, ignoring case."""
+    return list(deviceNameIndex.get(name.upper(), ()))
+
+
 # ---------------------- #
 # Socket Management
 # ---------------------- #
@@ -268,15 +294,10 @@ def closeDeviceConnections() -> None:
     global deviceRegistry
 
     for device in deviceRegistry.values():
-        if device.socket:
-            try:
-                device.listenerTask.cancel()
-                device.socket.close()
-                ml.slog(f"Closed socket for device {device.name}")
-            except OSError as e:
-                ml.elog(f"Error closing socket for device {device.name}: {e}")
+        cleanupDevice(device)
 
     deviceRegistry.clear()
+    deviceNameIndex.clear()
     ml.slog("Closed all device sockets and cleared registry.")
 
 
@@ -285,128 +306,305 @@ def closeDeviceConnections() -> None:
 # ---------------------- #
 
 
-async def _monitorSingleDevice(device: ESPDevice) -> None:
-    """Monitor a single device using LENGTH-based framing from v2 header."""
-    loop = asyncio.get_event_loop()
-    buffer = b""
+class _DeviceConnection(asyncio.BufferedProtocol):
+    """A device's TCP connection, which also serves as the device's writer once it is registered.
 
-    try:
-        while True:
-            data = await loop.sock_recv(device.socket, 4096)
-            if not data:
-                ml.elog(f"Device {device.name} disconnected.")
-                removeDevice(device)
-                break
-
-            buffer += data
-
-            # Use LENGTH field for framing
-            while len(buffer) >= HEADER_SIZE:
-                try:
-                    packet_len = get_packet_len(buffer)
-                    if len(buffer) < packet_len:
-                        break  # Need more data
-
-                    packet_data = buffer[:packet_len]
-                    packet = decode_packet_server(packet_data)
-
-                    ml.plog(f"Decoded {type(packet).__name__} from {device.name}")
-
-                    match packet:
-                        case DataPacket():
-                            ml.elog(f"Unexpected DATA packet received over TCP from {device.name}. This should be sent over UDP. Ignoring.")
-
-                        case StatusPacket(control_states=control_states) if isinstance(device, SensorMonitor) and control_states:
-                            for control_state in control_states:
-                                control_names = list(device.controls.keys())
-                                if control_state.id < len(control_names):
-                                    control_name = control_names[control_state.id]
-                                    state_str = (
-                                        "OPEN"
-                                        if control_state.state == ControlState.OPEN
-                                        else "CLOSED"
-                                        if control_state.state == ControlState.CLOSED
-                                        else "UNKNOWN"
-                                    )
-                                    device.controls[control_name].state = state_str
-                                    ml.log(f"{device.name} STATUS {control_name} {state_str}")
-
-                        case AckPacket():
-                            if packet.ack_packet_type == PacketType.TIMESYNC:
-                                device.last_sync_time = time.monotonic()
-                                device._resync_pending = False
-                                ml.plog(f"{device.name} TIMESYNC completed")
-                            elif packet.ack_packet_type == PacketType.HEARTBEAT:
-                                device.handleHeartbeatAck(packet.ack_sequence)
-                                ml.plog(f"{device.name} HEARTBEAT ACK seq={packet.ack_sequence}")
-                            elif packet.ack_packet_type == PacketType.CONTROL:
-                                # Check for pending control command
-                                if packet.ack_sequence in device._pending_controls:
-                                    control_name, state = device._pending_controls.pop(packet.ack_sequence)
-
-                                    # Send status log for control ACK
-                                    state_str = "OPEN" if state == "OPEN" else "CLOSED" if state == "CLOSE" else "UNKNOWN"
-                                    if isinstance(device, SensorMonitor) and control_name in device.controls:
-                                        device.controls[control_name].state = state_str
-                                        ml.log(f"{device.name} STATUS {control_name} {state_str}")
-                                else:
-                                    ml.plog(f"{device.name} ACK for CONTROL seq={packet.ack_sequence}")
-                            else:
-                                ml.plog(f"{device.name} ACK for {packet.ack_packet_type.name} seq={packet.ack_sequence}")
-
-                        case NackPacket():
-                            ml.plog(f"{device.name} NACK for {packet.nack_packet_type.name} error={packet.error_code.name}")
-
-                        case _:
-                            ml.elog(f"Received unexpected packet type {type(packet).__name__} from {device.name} over TCP")
-
-                    buffer = buffer[packet_len:]
-
-                    # Periodic resync check
-                    if (
-                        not device._resync_pending
-                        and device.last_sync_time is not None
-                        and time.monotonic() - device.last_sync_time > ESPDevice.RESYNC_INTERVAL_S
-                    ):
-                        device._resync_pending = True
-                        timesync = SimplePacket.create(PacketType.TIMESYNC)
-                        await loop.sock_sendall(device.socket, timesync.encode())
-                        ml.plog(f"{device.name} resync sent (stale >{ESPDevice.RESYNC_INTERVAL_S / 60:.0f} min)")
-
-                except ValueError:
-                    break
-                except Exception as e:
-                    ml.elog(f"Error decoding packet from {device.name}: {e}")
-                    buffer = buffer[1:]
+    The transport receives straight into a fixed buffer (recv_into) and packets are framed out of it as they arrive,
+    using the LENGTH field of the v2 header. The first packet must be the device's CONFIG.
+    """
 
-    except asyncio.CancelledError:
-        ml.slog(f"Stopped monitoring {device.name}")
-        raise
-    except Exception as e:
-        ml.elog(f"Error receiving response from {device.name}: {e}")
-        if device.address in deviceRegistry:
+    def __init__(self) -> None:
+        # Fixed-size receive buffer, allocated once per connection and never resized, so one view of it can be handed to
+        # the transport and decoded from for the connection's lifetime. Bytes in [start, end) are received but not yet consumed.
+        self._buffer = bytearray(TCP_RX_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._packet_len: int | None = None  # Length of the packet at the front of the buffer, kept across partial reads
+
+        self.transport: asyncio.Transport | None = None
+        self.device_ip = ""
+        self.device: ESPDevice | None = None
+        self._is_sensor_monitor = False
+        self._onboarding = False
+        self._config_timeout: asyncio.TimerHandle | None = None
+        self._drain_waiter: asyncio.Future[None] | None = None  # Set while the transport has paused writing
+
+    # Protocol callbacks #
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+        self.device_ip = transport.get_extra_info("peername")[0]
+
+        ml.slog(f"Accepted TCP connection from {self.device_ip}")
+
+        # A device answering several discovery broadcasts can open parallel connections; only the first is onboarded
+        if self.device_ip in onboardingIPs:
+            ml.elog(f"Device {self.device_ip} is already being onboarded. Closing duplicate connection.")
+            transport.close()
+            return
+
+        _tuneDeviceSocket(transport.get_extra_info("socket"))
+
+        onboardingIPs.add(self.device_ip)
+        self._onboarding = True
+
+        # Bounded so a device that stalls mid-handshake doesn't hold its connection open indefinitely
+        self._config_timeout = asyncio.get_running_loop().call_later(CONFIG_TIMEOUT_S, self._configTimedOut)
+
+    def get_buffer(self, sizehint: int) -> memoryview:  # noqa: ARG002
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self._end += nbytes
+        view = self._view
+        start = self._start
+        end = self._end
+        packet_len = self._packet_len
+        transport = self.transport
+
+        while end - start >= HEADER_SIZE and not transport.is_closing():
+            try:
+                if packet_len is None:
+                    packet_len = get_packet_len(view[start:start + HEADER_SIZE])
+                if end - start < packet_len:
+                    break  # Need more data
+
+                packet = decode_packet_server(view[start:start + packet_len])
+            except ValueError as e:
+                # A full packet with a field we can't map (e.g. an unknown enum value). Drop it whole so it can't sit at
+                # the head of the buffer until the buffer fills.
+                ml.elog(f"Dropping undecodable packet from {self.device.name if self.device else self.device_ip}: {e}")
+                start += packet_len if packet_len is not None else 1
+                packet_len = None
+                continue
+            except Exception as e:
+                ml.elog(f"Error decoding packet from {self.device.name if self.device else self.device_ip}: {e}")
+                start += 1
+                packet_len = None
+                continue
+
+            start += packet_len
+            packet_len = None
+
+            if self.device is None:
+                self._onboard(packet)
+                continue
+
+            try:
+                self._handlePacket(packet)
+            except Exception as e:
+                ml.elog(f"Error handling packet from {self.device.name}: {e}")
+
+        # Reads usually end on a packet boundary, leaving nothing to keep. Otherwise move the partial packet back to the
+        # front so the next read has the rest of the buffer to fill.
+        if start == end:
+            start = end = 0
+        elif start:
+            view[:end - start] = view[start:end]
+            end -= start
+            start = 0
+
+        self._start = start
+        self._end = end
+        self._packet_len = packet_len
+
+    def pause_writing(self) -> None:
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+
+    def resume_writing(self) -> None:
+        self._wakeDrainWaiter()
+
+    def connection_lost(self, exc: Exception | None) -> None:  # noqa: ARG002
+        if self._config_timeout is not None:
+            self._config_timeout.cancel()
+        self._wakeDrainWaiter()
+
+        if self._onboarding:
+            self._onboarding = False
+            onboardingIPs.discard(self.device_ip)
+            ml.elog(f"Device {self.device_ip} disconnected during config.")
+            return
+
+        device = self.device
+        if device is None:
+            return
+
+        # The device's writer is cleared when the server closes the connection itself (e.g. the device was removed)
+        if device.writer is self:
+            ml.elog(f"Device {device.name} disconnected.")
             removeDevice(device)
+        else:
+            ml.slog(f"Stopped monitoring {device.name}")
+
+    # Writer interface used by ESPDevice and the device control tools #
+
+    def write(self, data: bytes) -> None:
+        self.transport.write(data)
+
+    async def drain(self) -> None:
+        """Wait for the transport's write buffer to drop below its high-water mark."""
+        if self._drain_waiter is not None:
+            await asyncio.shield(self._drain_waiter)
+        if self.transport.is_closing():
+            raise ConnectionResetError("Connection lost")
+
+    def close(self) -> None:
+        self.transport.close()
+
+    # Internals #
+
+    def _wakeDrainWaiter(self) -> None:
+        waiter = self._drain_waiter
+        self._drain_waiter = None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def _configTimedOut(self) -> None:
+        ml.elog(f"Device {self.device_ip} did not send CONFIG within {CONFIG_TIMEOUT_S}s. Closing connection.")
+        self.transport.close()
+
+    def _onboard(self, packet: object) -> None:
+        """Register the device described by its CONFIG packet, then sync it."""
+        deviceIP = self.device_ip
+
+        try:
+            if not isinstance(packet, ConfigPacket):
+                ml.elog(f"Device {deviceIP} sent {type(packet).__name__} before CONFIG. Closing connection.")
+                self.transport.close()
+                return
+
+            config_dict = orjson.loads(packet.config_json)
+
+            # If a device with the same IP is already registered, close the old connection before registering the new one
+            # Prevents issues with devices rebooting and reconnecting before the disconnect is detected
+            if deviceIP in deviceRegistry:
+                ml.elog(f"Device {deviceIP} attempted to connect and is already registered. Closing old connection.")
+                _unregisterDevice(deviceRegistry[deviceIP])
+
+            if config_dict.get("device_type") in {"Sensor Monitor", "Simulated Sensor Monitor"}:
+                newDevice = SensorMonitor(self, deviceIP, config_dict)
+            else:
+                newDevice = ESPDevice(self, deviceIP, config_dict)
+
+            deviceRegistry[deviceIP] = newDevice
+            deviceNameIndex.setdefault(newDevice.name.upper(), []).append(newDevice)
+
+            self.device = newDevice
+            self._is_sensor_monitor = isinstance(newDevice, SensorMonitor)
+            self._onboarding = False
+            self._config_timeout.cancel()
+            onboardingIPs.discard(deviceIP)
+
+            ml.slog(f"Device {newDevice.name} registered from {deviceIP}")
+            ml.log(f"{newDevice.name} CONNECTED")  # Used by GUI to trigger device addition
+
+            # ACK the CONFIG, then send initial TIMESYNC and STATUS_REQUEST. Written as one buffer so the transport sends
+            # them in a single syscall/segment rather than one each (asyncio already sets TCP_NODELAY on the socket).
+            ack = AckPacket.create(PacketType.CONFIG, packet.sequence)
+            timesync = SimplePacket.create(PacketType.TIMESYNC)
+            status_request = SimplePacket.create(PacketType.STATUS_REQUEST)
+            self.write(b"".join((ack.encode(), timesync.encode(), status_request.encode())))
+            ml.plog(f"Sent initial TIMESYNC and STATUS_REQUEST to {newDevice.name}")
+
+        except Exception as e:
+            ml.elog(f"Error onboarding device {deviceIP}: {e}")
+            if self.device is None:
+                self.transport.close()
+
+    def _handlePacket(self, packet: object) -> None:
+        """Handle a packet from a registered device."""
+        device = self.device
+        device_name = device.name
+
+        ml.plog(f"Decoded {type(packet).__name__} from {device_name}")
+
+        # Cases ordered by how often each arrives over TCP: ACKs (heartbeats, controls) first, DATA should never
+        match packet:
+            case AckPacket():
+                if packet.ack_packet_type == PacketType.TIMESYNC:
+                    device.last_sync_time = time.monotonic()
+                    device._resync_pending = False
+                    ml.plog(f"{device_name} TIMESYNC completed")
+                elif packet.ack_packet_type == PacketType.HEARTBEAT:
+                    device.handleHeartbeatAck(packet.ack_sequence)
+                    ml.plog(f"{device_name} HEARTBEAT ACK seq={packet.ack_sequence}")
+                elif packet.ack_packet_type == PacketType.CONTROL:
+                    # Check for pending control command
+                    if packet.ack_sequence in device._pending_controls:
+                        control_name, state = device._pending_controls.pop(packet.ack_sequence)
+
+                        # Send status log for control ACK
+                        state_str = "OPEN" if state == "OPEN" else "CLOSED" if state == "CLOSE" else "UNKNOWN"
+                        if self._is_sensor_monitor and control_name in device.controls:
+                            device.controls[control_name].state = state_str
+                            ml.log(f"{device_name} STATUS {control_name} {state_str}")
+                    else:
+                        ml.plog(f"{device_name} ACK for CONTROL seq={packet.ack_sequence}")
+                else:
+                    ml.plog(f"{device_name} ACK for {packet.ack_packet_type.name} seq={packet.ack_sequence}")
+
+            case StatusPacket(control_states=control_states) if self._is_sensor_monitor and control_states:
+                control_names = device.control_names
+                for control_state in control_states:
+                    if control_state.id < len(control_names):
+                        control_name = control_names[control_state.id]
+                        state_str = (
+                            "OPEN"
+                            if control_state.state == ControlState.OPEN
+                            else "CLOSED"
+                            if control_state.state == ControlState.CLOSED
+                            else "UNKNOWN"
+                        )
+                        device.controls[control_name].state = state_str
+                        ml.log(f"{device_name} STATUS {control_name} {state_str}")
+
+            case NackPacket():
+                ml.plog(f"{device_name} NACK for {packet.nack_packet_type.name} error={packet.error_code.name}")
+
+            case DataPacket():
+                ml.elog(f"Unexpected DATA packet received over TCP from {device_name}. This should be sent over UDP. Ignoring.")
+
+            case _:
+                ml.elog(f"Received unexpected packet type {type(packet).__name__} from {device_name} over TCP")
+
+        # Periodic resync check
+        if (
+            not device._resync_pending
+            and device.last_sync_time is not None
+            and time.monotonic() - device.last_sync_time > ESPDevice.RESYNC_INTERVAL_S
+        ):
+            device._resync_pending = True
+            timesync = SimplePacket.create(PacketType.TIMESYNC)
+            self.write(timesync.encode())
+            ml.plog(f"{device_name} resync sent (stale >{ESPDevice.RESYNC_INTERVAL_S / 60:.0f} min)")
 
 # ---------------------- #
 # Device Control Tools
 # ---------------------- #
 
 
-async def getSingle(device: ESPDevice) -> None:
-    if device.socket:
-        try:
-            packet = SimplePacket.create(PacketType.GET_SINGLE)
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent GET_SINGLE command to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending GET_SINGLE command to {device.name}: {e}")
-            if device.address in deviceRegistry:
-                _removed = deviceRegistry.pop(device.address)
-                ml.slog(f"{_removed.name} removed from registry")
-    else:
-        ml.elog(f"No socket available for {device.name} to send GET_SINGLE command.")
+async def _sendPacket(device: ESPDevice, packet: ClientReceivedPacket, tag: str) -> bool:
+    """Send a packet to a device, removing the device if its connection has failed."""
+    if not device.writer:
+        ml.elog(f"No socket available for {device.name} to send {tag} command.")
         removeDevice(device)
+        return False
+
+    try:
+        device.writer.write(packet.encode())
+        await device.writer.drain()
+    except Exception as e:
+        ml.elog(f"Error sending {tag} command to {device.name}: {e}")
+        removeDevice(device)
+        return False
+
+    ml.slog(f"Sent {tag} command to {device.name}")
+    return True
+
+
+async def getSingle(device: ESPDevice) -> None:
+    await _sendPacket(device, SimplePacket.create(PacketType.GET_SINGLE), "GET_SINGLE")
 
 
 async def startStreaming(device: ESPDevice, Hz: int) -> None:
@@ -414,125 +612,58 @@ async def startStreaming(device: ESPDevice, Hz: int) -> None:
         ml.elog(f"Invalid frequency: {Hz}. Must be between 1-65535 Hz.")
         return
 
-    if device.socket:
-        try:
-            packet = StreamStartPacket.create(frequency_hz=Hz)
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent STREAM_START ({Hz} Hz) to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending STREAM_START command to {device.name}: {e}")
-            if device.address in deviceRegistry:
-                _removed = deviceRegistry.pop(device.address)
-                ml.slog(f"{device.name} removed from registry")
-    else:
-        ml.elog(f"No socket available for {device.name} to send STREAM_START command.")
-        removeDevice(device)
+    await _sendPacket(device, StreamStartPacket.create(frequency_hz=Hz), f"STREAM_START ({Hz} Hz)")
 
 
 async def stopStreaming(device: ESPDevice) -> None:
-    if device.socket:
-        try:
-            packet = SimplePacket.create(PacketType.STREAM_STOP)
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent STREAM_STOP command to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending STREAM_STOP command to {device.name}: {e}")
-            if device.address in deviceRegistry:
-                _removed = deviceRegistry.pop(device.address)
-                ml.slog(f"{device.name} removed from registry")
-    else:
-        ml.elog(f"No socket available for {device.name} to send STREAM_STOP command.")
-        removeDevice(device)
+    await _sendPacket(device, SimplePacket.create(PacketType.STREAM_STOP), "STREAM_STOP")
 
 
 async def setControl(device: SensorMonitor, controlName: str, controlState: str) -> None:
     controlName = controlName.upper()
     controlState = controlState.upper()
 
-    if controlName not in device.controls:
-        ml.elog(f"Invalid control name '{controlName}'. Valid: {list(device.controls.keys())}")
+    command_id = device.control_ids.get(controlName)
+    if command_id is None:
+        ml.elog(f"Invalid control name '{controlName}'. Valid: {device.control_names}")
         return
 
     if controlState not in ["OPEN", "CLOSE"]:
         ml.elog(f"Invalid state '{controlState}'. Valid: OPEN, CLOSE")
         return
 
-    control_names = list(device.controls.keys())
-    command_id = control_names.index(controlName)
-
     state = ControlState.OPEN if controlState == "OPEN" else ControlState.CLOSED
+    packet = ControlPacket.create(command_id=command_id, command_state=state)
 
-    if device.socket:
-        try:
-            packet = ControlPacket.create(command_id=command_id, command_state=state)
-
-            # Store pending control BEFORE sending (to avoid race condition)
-            device._pending_controls[packet.sequence] = (controlName, controlState.upper())
+    # Store pending control BEFORE sending (to avoid race condition)
+    device._pending_controls[packet.sequence] = (controlName, controlState)
 
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent CONTROL command (id={command_id}, {controlName} {controlState}) to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending CONTROL command to {device.name}: {e}")
-            # Clean up pending control on send failure
-            if packet.sequence in device._pending_controls:
-                device._pending_controls.pop(packet.sequence)
-            if device.address in deviceRegistry:
-                removeDevice(device)
-    else:
-        ml.elog(f"No socket available for {device.name} to send CONTROL command.")
+    if not await _sendPacket(device, packet, f"CONTROL (id={command_id}, {controlName} {controlState})"):
+        device._pending_controls.pop(packet.sequence, None)
 
 
 async def getStatus(device: ESPDevice) -> None:
-    if device.socket:
-        try:
-            packet = SimplePacket.create(PacketType.STATUS_REQUEST)
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent STATUS_REQUEST command to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending STATUS_REQUEST command to {device.name}: {e}")
-            if device.address in deviceRegistry:
-                removeDevice(device)
-    else:
-        ml.elog(f"No socket available for {device.name} to send STATUS_REQUEST command.")
-        removeDevice(device)
+    await _sendPacket(device, SimplePacket.create(PacketType.STATUS_REQUEST), "STATUS_REQUEST")
 
 
 async def emergencyStop(device: ESPDevice) -> None:
-    if device.socket:
-        try:
-            packet = SimplePacket.create(PacketType.ESTOP)
-            loop = asyncio.get_event_loop()
-            await loop.sock_sendall(device.socket, packet.encode())
-            ml.slog(f"Sent EMERGENCY STOP command to {device.name}")
-        except Exception as e:
-            ml.elog(f"Error sending EMERGENCY STOP command to {device.name}: {e}")
-            if device.address in deviceRegistry:
-                removeDevice(device)
+    await _sendPacket(device, SimplePacket.create(PacketType.ESTOP), "EMERGENCY STOP")
+
+
+async def emergencyStopAll() -> None:
+    """Send ESTOP to every registered device at once, so one slow connection doesn't delay the stop on the others."""
+    await asyncio.gather(*(emergencyStop(device) for device in getRegisteredDevices().values()))
 
 
 def cleanupDevice(device: ESPDevice) -> None:
-    if device.address in deviceRegistry:
-        if device.socket:
-            try:
-                device.socket.close()
-                ml.slog(f"Closed socket for {device.name}")
-            except OSError as e:
-                ml.elog(f"Error closing socket for {device.name}: {e}")
-            finally:
-                device.socket = None
-
-    # Cancel any per-device listener task to avoid it running against a closed socket
-    listener_task = getattr(device, "listenerTask", None)
-    if listener_task is not None:
+    if device.writer:
         try:
-            listener_task.cancel()
-            ml.slog(f"Cancelled listener task for {device.name}")
-        except Exception as e:
-            ml.elog(f"Error cancelling listener task for {device.name}: {e}")
+            device.writer.close()
+            ml.slog(f"Closed socket for {device.name}")
+        except OSError as e:
+            ml.elog(f"Error closing socket for {device.name}: {e}")
+        finally:
+            device.writer = None
 
     heartbeat_task = getattr(device, "heartbeat_task", None)
     if heartbeat_task is not None:
@@ -544,12 +675,28 @@ def cleanupDevice(device: ESPDevice) -> None:
 
 
 def removeDevice(device: ESPDevice) -> None:
-    if device.address in deviceRegistry:
-        cleanupDevice(device)
-        del deviceRegistry[device.address]
+    # Compare by identity: the address may already belong to a newer connection from the same device
+    if deviceRegistry.get(device.address) is not device:
+        if device.writer:
+            cleanupDevice(device)  # Stale device, only make sure its connection is released
+        return
+
+    _unregisterDevice(device)
+
+    ml.slog(f"{device.name} removed from registry.")
+    ml.log(f"{device.name} DISCONNECTED")  # Used by GUI to trigger device removal
+
 
-        ml.slog(f"{device.name} removed from registry.")
-        ml.log(f"{device.name} DISCONNECTED")  # Used by GUI to trigger device removal
+def _unregisterDevice(device: ESPDevice) -> None:
+    """Release a registered device's connection and drop it from the registry and name index."""
+    cleanupDevice(device)
+    del deviceRegistry[device.address]
+    # Other devices may share the name, so only this one is dropped from its entry
+    matches = deviceNameIndex.get(device.name.upper())
+    if matches is not None and device in matches:
+        matches.remove(device)
+        if not matches:
+            del deviceNameIndex[device.name.upper()]
 
 
 # ---------------------- #
@@ -557,22 +704,51 @@ def removeDevice(device: ESPDevice) -> None:
 # ---------------------- #
 
 
-def exportDataToCSV() -> None:
+async def exportDataToCSV() -> None:
     testTime = time.strftime("%Y%m%d-%H%M%S")
+    exports: list[tuple[str, ESPDevice]] = []  # (filename, device), in the same order as writes
+    writes = []
 
     for device in deviceRegistry.values():
         if isinstance(device, SensorMonitor):
-            testTime = time.strftime("%Y%m%d-%H:%M:%S")
-            deviceFilename = f"test_data/{device.name}_{testTime}.csv"
+            # Include the address since two boards flashed with the same firmware report the same name
+            deviceFilename = f"test_data/{device.name}_{device.address}_{testTime}.csv"
+
+            sensors = list(device.sensors.values())
+            lengths = [len(device.times), *(len(sensor.data) for sensor in sensors)]
+            rows = min(lengths)
+            if rows != max(lengths):
+                # Columns are padded as packets arrive, so this means samples were added some other way. Export the
+                # aligned prefix but say so rather than writing shifted data silently.
+                ml.elog(f"Data columns for {device.name} ({device.address}) have different lengths {lengths}. Exporting the first {rows} rows.")
+
+            # Snapshot the columns here on the event loop so streaming can't change them mid-write. The sample arrays are
+            # read in place; column_stack makes the only copy and releases the views before anything appends again.
+            columns = np.column_stack(
+                [np.frombuffer(device.times, dtype=np.float64, count=rows)]
+                + [np.frombuffer(sensor.data, dtype=np.float64, count=rows) for sensor in sensors],
+            )
+            header = ",".join(["Time", *(sensor.name for sensor in sensors)])
+
+            exports.append((deviceFilename, device))
+            writes.append(asyncio.to_thread(_writeCSV, deviceFilename, header, columns))
+
+    # Formatting long tests takes a while, so the files are written from worker threads to keep device traffic flowing
+    results = await asyncio.gather(*writes, return_exceptions=True)
+
+    for (deviceFilename, device), result in zip(exports, results, strict=True):
+        if isinstance(result, Exception):
+            ml.elog(f"Error exporting data to {deviceFilename} for device {device.name}: {result}")
+        else:
+            ml.slog(f"Exported data to {deviceFilename} for device: {device.name}")
 
-            sensorNames = [sensor.name for sensor in device.sensors.values()]
 
-            with open(deviceFilename, mode="w", newline="") as csvfile:
-                writer = csv.writer(csvfile)
-                header = ["Time", *sensorNames]
-                writer.writerow(header)
-                for i in range(len(device.times)):
-                    row = [device.times[i]] + [sensor.data[i] for sensor in device.sensors.values()]
-                    writer.writerow(row)
+def _writeCSV(filename: str, header: str, columns: np.ndarray) -> None:
+    rowFormat = ",".join(["%.3f"] + ["%.7g"] * (columns.shape[1] - 1)) + "\n"
 
-            ml.slog(f"Exported data to {deviceFilename} for device: {device.name}")
+    with open(filename, mode="w", newline="") as csvfile:
+        csvfile.write(header + "\n")
+        # Format a block of rows with one % operation and one write, rather than one of each per row like savetxt
+        for i in range(0, len(columns), CSV_CHUNK_ROWS):
+            chunk = columns[i:i + CSV_CHUNK_ROWS]
+            csvfile.write((rowFormat * len(chunk)) % tuple(chunk.ravel().tolist()))
@@ -1,3 +1,4 @@
+import asyncio
 
 from kasa import Device, Discover, KasaException
 
@@ -12,8 +13,15 @@ async def discoverKasaDevices() -> None:
         ml.slog("Sending kasa discovery request...")
 
         devices = await Discover.discover()
-        for dev in devices.values():
-            await dev.update()
+
+        # Each update is a round trip to the plug, so they run concurrently. One unreachable plug shouldn't stop the
+        # rest from being registered.
+        results = await asyncio.gather(*(dev.update() for dev in devices.values()), return_exceptions=True)
+
+        for dev, result in zip(devices.values(), results, strict=True):
+            if isinstance(result, Exception):
+                ml.elog(f"Failed to update Kasa device at {dev.host}: {result}")
+                continue
             ml.slog(f"Discovered Kasa device: {dev.alias if dev.alias is not None else '<No Alias>'} ({dev.host})")
             kasaRegistry[dev.host] = dev
 
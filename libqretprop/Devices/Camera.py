@@ -6,6 +6,39 @@ import onvif
 import libqretprop.configManager as config
 
 
+WSDL_PATH = os.path.join(os.path.dirname(onvif.__file__), 'wsdl/')  # ONVIF wsdl files shipped with the onvif package
+ONVIF_PROBE_TIMEOUT_S = 1  # How long a cached client gets to answer before it is rebuilt
+
+_ONVIF_CLIENTS: dict[tuple[str, int], onvif.ONVIFCamera] = {}  # Connected ONVIF clients reused across reconnects
+
+
+async def _getONVIFClient(address: str, port: int) -> onvif.ONVIFCamera:
+    """Return a connected ONVIF client, reusing the cached one if it still answers."""
+    key = (address, port)
+    client = _ONVIF_CLIENTS.get(key)
+
+    if client is not None:
+        try:
+            devicemgmt = await client.create_devicemgmt_service()
+            await asyncio.wait_for(devicemgmt.GetHostname(), timeout=ONVIF_PROBE_TIMEOUT_S)
+        except Exception:
+            # Stale client (camera rebooted or changed addresses), rebuild it below
+            del _ONVIF_CLIENTS[key]
+            await client.close()
+        else:
+            return client
+
+    client = onvif.ONVIFCamera(address, port, config.serverConfig["accounts"]["camera"]["username"], config.serverConfig["accounts"]["camera"]["password"], WSDL_PATH)
+    try:
+        await asyncio.wait_for(client.update_xaddrs(), timeout=5)
+    except Exception:
+        await client.close()
+        raise
+
+    _ONVIF_CLIENTS[key] = client
+    return client
+
+
 class Camera:
     """A top level class representing the configuration of a connected Camera device.
 
@@ -27,18 +60,16 @@ class Camera:
         self.recording = False
 
     async def connect(self) -> None:
+        self.camera = None
         try:
-            # Load wsdl files for ONVIF
-            wsdl_path = os.path.join(os.path.dirname(onvif.__file__), 'wsdl/')
+            self.camera = await _getONVIFClient(self.address, self.port)
 
-            self.camera = onvif.ONVIFCamera(self.address, self.port, config.serverConfig["accounts"]["camera"]["username"], config.serverConfig["accounts"]["camera"]["password"], wsdl_path)
-            await asyncio.wait_for(self.camera.update_xaddrs(), timeout=5)
-
-
-            # ONVIF Services
-            self.devicemgmt = await self.camera.create_devicemgmt_service()
-            self.ptz = await self.camera.create_ptz_service()
-            self.media = await self.camera.create_media_service()
+            # ONVIF Services. Created together since they don't depend on each other
+            self.devicemgmt, self.ptz, self.media = await asyncio.gather(
+                self.camera.create_devicemgmt_service(),
+                self.camera.create_ptz_service(),
+                self.camera.create_media_service(),
+            )
 
             # Get hostname
             hostname = await self.devicemgmt.GetHostname()
@@ -51,10 +82,14 @@ class Camera:
             # Token (needed for PTZ and media commands)
             self.token = (await self.media.GetProfiles())[0].token
         except asyncio.TimeoutError as e:
-            if self.camera is not None:
-                await self.camera.close()
+            await self._dropClient()
             raise Exception("Connection timed out") from e
         except Exception:
-            if self.camera is not None:
-                await self.camera.close()
-            raise
\ No newline at end of file
+            await self._dropClient()
+            raise
+
+    async def _dropClient(self) -> None:
+        """Close this camera's ONVIF client and evict it from the cache."""
+        if self.camera is not None:
+            _ONVIF_CLIENTS.pop((self.address, self.port), None)
+            await self.camera.close()
\ No newline at end of file
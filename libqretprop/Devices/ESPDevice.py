@@ -1,5 +1,4 @@
 import asyncio
-import socket
 from typing import TYPE_CHECKING, Any, ClassVar
 
 import libqretprop.mylogging as ml
@@ -8,6 +7,7 @@ from libqretprop.protocol import PacketType, SimplePacket
 
 
 if TYPE_CHECKING:
+    from libqretprop.DeviceControllers.deviceTools import _DeviceConnection
     from libqretprop.Devices.SensorMonitor import SensorMonitor
 
 
@@ -18,8 +18,9 @@ class ESPDevice:
 
     Parameters
     ----------
-        jsonConfig (dict): The JSON configuration of the device, streamed back from the ESP32 on initial connection.
+        writer (_DeviceConnection): The device's TCP connection, used to send packets to the device.
         address (str): The IP address of the ESP32 device.
+        jsonConfig (dict): The JSON configuration of the device, streamed back from the ESP32 on initial connection.
 
     """
 
@@ -29,14 +30,13 @@ class ESPDevice:
 
     def __init__(
         self,
-        socket: socket.socket,
+        writer: "_DeviceConnection",
         address: str,
         jsonConfig: dict[str, Any],
     ) -> None:
-        self.socket = socket
+        self.writer: _DeviceConnection | None = writer
         self.address = address
         self.jsonConfig = jsonConfig
-        self.listenerTask: asyncio.Task[Any]
 
         self.name: str = jsonConfig["device_name"]
         self.type = jsonConfig["device_type"]
@@ -68,7 +68,7 @@ class ESPDevice:
     async def heartbeat(self) -> None:
         """Send a heartbeat to the device every 5 seconds to keep TCP alive."""
         while True:
-            if self.socket:
+            if self.writer:
                 if self._heartbeat_ack_pending:
                     self._missed_heartbeat_acks += 1
                     if self._missed_heartbeat_acks >= self.HEARTBEAT_ACK_MISS_LIMIT:
@@ -79,8 +79,8 @@ class ESPDevice:
 
                 try:
                     packet = SimplePacket.create(PacketType.HEARTBEAT)
-                    loop = asyncio.get_event_loop()
-                    await loop.sock_sendall(self.socket, packet.encode())
+                    self.writer.write(packet.encode())
+                    await self.writer.drain()
                     self._last_heartbeat_sequence = packet.sequence
                     self._heartbeat_ack_pending = True
                 except (BrokenPipeError, ConnectionResetError, OSError) as e:
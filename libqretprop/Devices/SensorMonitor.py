@@ -1,6 +1,7 @@
-import socket
 import time
-from typing import Any
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
 
 from libqretprop.DeviceControllers import deviceTools
 from libqretprop.Devices.Control import Control
@@ -12,6 +13,10 @@ from libqretprop.Devices.sensors.Resistance import Resistance
 from libqretprop.Devices.sensors.Thermocouple import Thermocouple
 
 
+if TYPE_CHECKING:
+    from libqretprop.DeviceControllers.deviceTools import _DeviceConnection
+
+
 class SensorMonitor(ESPDevice):
     """Class of device which is an ESP32 that reads sensor data.
 
@@ -21,11 +26,11 @@ class SensorMonitor(ESPDevice):
 
     """
 
-    def __init__(self, socket: socket.socket, address: str, config: dict[str, Any]) -> None:
-        super().__init__(socket, address, config)
+    def __init__(self, writer: "_DeviceConnection", address: str, config: dict[str, Any]) -> None:
+        super().__init__(writer, address, config)
 
         # Storing the default information inherited from the parent class
-        self.socket = socket
+        self.writer = writer
         self.address = address
         self.jsonConfig: dict[str, str] = config
 
@@ -33,9 +38,12 @@ class SensorMonitor(ESPDevice):
         self.type = config.get("device_type")
 
         self.startTime = time.monotonic()  # Start time for the device, used for uptime tracking
-        self.times: list[float] = []
+        self.times: array[float] = array("d")
         self.sensors, self.controls = self._initializeFromConfig(config)
         self.sensor_names: list[str] = list(self.sensors.keys()) # Cache sensor names to avoid rebuilding list
+        self.sensor_data: list[array[float]] = [sensor.data for sensor in self.sensors.values()]  # Data lists indexed by QLCP sensor id
+        self.control_names: list[str] = list(self.controls.keys())  # Indexed by QLCP control id
+        self.control_ids: dict[str, int] = {name: i for i, name in enumerate(self.control_names)}
 
     # JSON.loads returns a dictionary where attributes are defined with string titles and can contain whatever as values.
     def _initializeFromConfig(
@@ -108,16 +116,16 @@ class SensorMonitor(ESPDevice):
 
         return sensors, controls
 
-    def addDataPoints(self, vals: dict[str, float]) -> None:
-        """Take a dict of sensor:value pairs and appends them to the corresponding sensor.
+    def addDataPoints(self, vals: Sequence[float]) -> None:
+        """Append one value per sensor, given in QLCP sensor id order.
 
         Logs the time of the data point as well.
 
         """
 
-        for sensorName, sensor in self.sensors.items():
-            if sensorName in vals:
-                sensor.data.append(vals[sensorName])
+        # Values arrive in the same order as sensor_data, so each is an index rather than a name lookup
+        for data, value in zip(self.sensor_data, vals, strict=True):
+            data.append(value)
 
         self.times.append(time.monotonic() - self.startTime)
 
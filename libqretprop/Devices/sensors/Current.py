@@ -1,3 +1,6 @@
+from array import array
+
+
 class Current:
     """Store information and data from a current sensor (CSA + ADC)."""
 
@@ -15,4 +18,4 @@ class Current:
         self.csaGain = csaGain
         self.unit = unit
 
-        self.data: list[float] = []
+        self.data: array[float] = array("d")  # Packed doubles, 8 bytes per sample
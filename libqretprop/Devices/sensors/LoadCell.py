@@ -1,3 +1,6 @@
+from array import array
+
+
 class LoadCell:
 
     def __init__ (self,
@@ -16,4 +19,4 @@ class LoadCell:
 
         self.fullScaleVoltage = excitationV * (sensitivityvV/1000) # input sensitivity in units of mv/V in the config file
 
-        self.data : list[float] = []
+        self.data: array[float] = array("d")  # Packed doubles, 8 bytes per sample
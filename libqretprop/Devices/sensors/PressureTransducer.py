@@ -1,3 +1,6 @@
+from array import array
+
+
 class PressureTransducer:
     """Store information and data from a pressure transducer.
 
@@ -19,4 +22,4 @@ class PressureTransducer:
         self.maxPressurePSI = maxPressurePSI
         self.unit = unit
 
-        self.data : list[float] = []
+        self.data: array[float] = array("d")  # Packed doubles, 8 bytes per sample
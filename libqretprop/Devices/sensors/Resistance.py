@@ -1,3 +1,6 @@
+from array import array
+
+
 class Resistance:
     """Store information and data from a resistance sensor (IDAC + ADC)."""
 
@@ -16,4 +19,4 @@ class Resistance:
         self.rShort = rShort
         self.unit = unit
 
-        self.data: list[float] = []
+        self.data: array[float] = array("d")  # Packed doubles, 8 bytes per sample
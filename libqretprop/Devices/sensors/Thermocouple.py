@@ -1,3 +1,6 @@
+from array import array
+
+
 class Thermocouple:
     """Class for storing thermocouple data from an ESP32.
 
@@ -17,4 +20,4 @@ class Thermocouple:
         self.type = thermoType
         self.unit = unit
 
-        self.data: list[float] = []
+        self.data: array[float] = array("d")  # Packed doubles, 8 bytes per sample
@@ -5,6 +5,7 @@ import aioconsole
 
 import libqretprop.mylogging as ml
 from libqretprop.DeviceControllers import deviceTools
+from libqretprop.Devices.ESPDevice import ESPDevice
 from libqretprop.Devices.SensorMonitor import SensorMonitor
 
 
@@ -44,7 +45,7 @@ async def handleServerCommand(command: str, args: list) -> None:
         await asyncio.sleep(0.1)
     elif cmd == "DISCOVER":
         ml.slog("Sending discovery broadcast...")
-        deviceTools.sendDiscoveryBroadcast()
+        await deviceTools.sendDiscoveryBroadcast()
         ml.slog("Discovery sent. Devices will auto-connect.")
     elif cmd in ("AUTODISCOVERY", "AUTOD"):
         if not args:
@@ -98,14 +99,8 @@ async def handleServerCommand(command: str, args: list) -> None:
         if not args:
             ml.slog("Usage: remove <device_name>")
             return
-        devices = deviceTools.getRegisteredDevices()
-        device = None
-        for d in devices.values():
-            if d.name.upper() == args[0].upper():
-                device = d
-                break
+        device = _resolveDevice(args[0])
         if not device:
-            ml.slog(f"Device '{args[0]}' not currently registered. Use \"LIST\" to see devices.")
             return
         deviceTools.removeDevice(device)
         ml.slog(f"Removed device '{device.name}'")
@@ -114,14 +109,8 @@ async def handleServerCommand(command: str, args: list) -> None:
         if not args:
             ml.slog("Usage: info <device_name>")
             return
-        devices = deviceTools.getRegisteredDevices()
-        device = None
-        for d in devices.values():
-            if d.name.upper() == args[0].upper():
-                device = d
-                break
+        device = _resolveDevice(args[0])
         if not device:
-            ml.slog(f"Device '{args[0]}' not found")
             return
         ml.slog(f"Device: {device.name}")
         ml.slog(f"  Type: {device.type}")
@@ -149,31 +138,38 @@ async def handleServerCommand(command: str, args: list) -> None:
         ml.slog("  status <device>    - Get device status / control states")
         ml.slog("  expo               - Export data to CSV")
         ml.slog("  quit               - Exit")
+        ml.slog("  <device> is a device name, or its IP address if several devices share that name")
     elif cmd == "EXPO":
-        deviceTools.exportDataToCSV()
+        await deviceTools.exportDataToCSV()
         ml.slog("Data exported to test_data/")
     elif cmd == "ESTOP":
-        devices = deviceTools.getRegisteredDevices()
-        for device in devices.values():
-            await deviceTools.emergencyStop(device)
+        await deviceTools.emergencyStopAll()
         ml.slog("Emergency stop sent to all devices")
 
 
+def _resolveDevice(nameOrIP: str) -> ESPDevice | None:
+    """Find the device a command refers to, logging why when there isn't exactly one."""
+    device = deviceTools.getDeviceByName(nameOrIP)
+    if device is None:
+        matches = deviceTools.getDevicesByName(nameOrIP)
+        if matches:
+            # Refuse to guess which board a command like OPEN was meant for
+            addresses = ", ".join(match.address for match in matches)
+            ml.slog(f"Device name '{nameOrIP}' is shared by {addresses}. Use the IP address instead.")
+        else:
+            ml.slog(f"Device '{nameOrIP}' not found. Use 'list' to see devices.")
+    return device
+
+
 async def handleDeviceCommand(command: str, args: list) -> None:
     if not args:
         ml.slog(f"Usage: {command.lower()} <device_name> [args...]")
         return
 
     device_name = args[0]
-    devices = deviceTools.getRegisteredDevices()
-    device = None
-    for d in devices.values():
-        if d.name.lower() == device_name.lower():
-            device = d
-            break
+    device = _resolveDevice(device_name)
 
     if not device:
-        ml.slog(f"Device '{device_name}' not found. Use 'list' to see devices.")
         return
 
     if not isinstance(device, SensorMonitor):
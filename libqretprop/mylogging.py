@@ -1,7 +1,6 @@
-import contextlib
+from collections import deque
 from datetime import datetime
-from queue import Empty, Full, Queue
-from threading import Thread
+from threading import Event, Thread
 from zoneinfo import ZoneInfo
 
 import redis
@@ -10,8 +9,11 @@ import redis.exceptions
 
 redisClient: redis.Redis | None = None
 _MAX_LOG_QUEUE_SIZE = 50000
-_publishQueue: Queue[tuple[str, str, str]] = Queue(maxsize=_MAX_LOG_QUEUE_SIZE)  # (channel, message, color)
+# (channel, message, color). deque appends/pops are atomic, and maxlen drops the oldest entry under overload
+_publishQueue: deque[tuple[str, str, str]] = deque(maxlen=_MAX_LOG_QUEUE_SIZE)
+_publishReady = Event()  # Set when the worker may have messages to publish
 _PIPELINE_BATCH_SIZE = 256
+_LOG_TIMEZONE = ZoneInfo("America/New_York")
 
 
 def _applyColor(message: str, color: str) -> str:
@@ -23,36 +25,40 @@ def _applyColor(message: str, color: str) -> str:
         return f"\033[93m{message}\033[0m"
     return message
 
-def _formatMessage(message: str, color: str) -> str:
-    now = datetime.now(ZoneInfo("America/New_York"))
-    # Format: YYYY-MM-DDTHH:MM:SS.s-TZ (1 decimal place for seconds)
+def _timestampPrefix() -> str:
+    now = datetime.now(_LOG_TIMEZONE)
+    # Format: HH:MM:SS
     timestamp = now.strftime("%H:%M:%S")
-    timestamp_str = f"\033[90m[{timestamp}]\033[0m"  # Always dark grey
+    return f"\033[90m[{timestamp}]\033[0m"  # Always dark grey
+
+def _formatMessage(message: str, color: str, timestamp_str: str) -> str:
     return f"{timestamp_str} {_applyColor(message, color)}"
 
 def _publishWorker() -> None:
     """Background thread: batches and publishes log messages to Redis (non-blocking for callers)."""
     while True:
-        first = _publishQueue.get()
+        if not _publishQueue:
+            _publishReady.wait()
+            _publishReady.clear()
+            continue
 
         if redisClient is None:
+            _publishQueue.clear()
             continue
 
-        batch = [first]
-        while len(batch) < _PIPELINE_BATCH_SIZE:
-            try:
-                batch.append(_publishQueue.get_nowait())
-            except Empty:
-                break
+        batch = [_publishQueue.popleft() for _ in range(min(len(_publishQueue), _PIPELINE_BATCH_SIZE))]
+
+        # Timestamps have one-second resolution and a batch is drained at once, so the whole batch shares one
+        timestamp_str = _timestampPrefix()
 
         try:
             if len(batch) == 1:
                 channel, message, color = batch[0]
-                redisClient.publish(channel, _formatMessage(message, color))
+                redisClient.publish(channel, _formatMessage(message, color, timestamp_str))
             else:
                 pipe = redisClient.pipeline(transaction=False)
                 for channel, message, color in batch:
-                    pipe.publish(channel, _formatMessage(message, color))
+                    pipe.publish(channel, _formatMessage(message, color, timestamp_str))
                 pipe.execute()
         except Exception:
             pass
@@ -74,15 +80,10 @@ def _publishLog(channel: str, message: str, color: str = "") -> None:
     """Enqueue a log message for background publishing with optional ANSI color (non-blocking)."""
     if redisClient is None:
         raise ValueError("Logger not initialized. Call initLogger() first.")
-    item = (channel, message, color)
-    try:
-        _publishQueue.put_nowait(item)
-    except Full:
-        # Prefer newest logs under overload: evict one oldest entry, then enqueue latest.
-        with contextlib.suppress(Empty):
-            _publishQueue.get_nowait()
-        with contextlib.suppress(Full):
-            _publishQueue.put_nowait(item)
+    _publishQueue.append((channel, message, color))  # Prefers newest logs under overload: a full deque drops its oldest entry
+    # Only wake the worker when it is idle, so a busy stream doesn't take the Event's lock on every message
+    if not _publishReady.is_set():
+        _publishReady.set()
 
 def log(message: str) -> None:
     """Log a message to the base redis log channel."""
@@ -48,12 +48,13 @@ def _encode_buf():
     """Helper to create a new encoding buffer and length pointer for encoding packets."""
     return _ffi.new(f"uint8_t[{_ENCODE_BUF_SIZE}]"), _ffi.new("size_t *", _ENCODE_BUF_SIZE)
 
+# Out-parameter reused across calls; get_packet_len runs once per framed packet
+_packet_len = _ffi.new("uint16_t *")
+
 def get_packet_len(data: bytes) -> int:
     """Get the total length of a QLCP packet from its header. Useful for determining how many bytes to read for a full packet."""
-    buf = _ffi.from_buffer(data)
-    data_len = _ffi.new("uint16_t *")
-    _check(_lib.qlcp_get_packet_len(data_len, buf, len(data)), "get_packet_len")
-    return int(data_len[0])
+    _check(_lib.qlcp_get_packet_len(_packet_len, _ffi.from_buffer(data), len(data)), "get_packet_len")
+    return int(_packet_len[0])
 
 # ============================================================================
 # ENUMS
@@ -139,6 +140,11 @@ def _get_timestamp_ms() -> int:
 # PACKET TYPES AND ENCODING
 # ============================================================================
 
+# Reused by SimplePacket.encode; the encoded bytes are copied out before returning
+_header_only_buf = _ffi.new(f"uint8_t[{HEADER_SIZE}]")
+_header_only_buf_len = _ffi.new("size_t *")
+_header_only_pkt = _ffi.new("qlcp_header_only_packet *")
+
 @dataclass
 class SimplePacket:
     """Header-only packet. Used for ESTOP, DISCOVERY, HEARTBEAT,
@@ -156,17 +162,15 @@ class SimplePacket:
         )
 
     def encode(self) -> bytes:
-        buf, buf_len = _encode_buf()
-
-        pkt = _ffi.new("qlcp_header_only_packet *", {
-            "sequence":  self.sequence,
-            "timestamp": self.timestamp,
-        })
+        # Header-only packets are sent constantly (heartbeats, resyncs), so encode through the preallocated buffers
+        _header_only_buf_len[0] = HEADER_SIZE
+        _header_only_pkt.sequence = self.sequence
+        _header_only_pkt.timestamp = self.timestamp
         _check(
-            _lib.qlcp_encode_header_only(buf, buf_len, self.packet_type, pkt),
+            _lib.qlcp_encode_header_only(_header_only_buf, _header_only_buf_len, self.packet_type, _header_only_pkt),
             "encode_header_only"
         )
-        return bytes(_ffi.buffer(buf, buf_len[0]))
+        return bytes(_ffi.buffer(_header_only_buf, _header_only_buf_len[0]))
 
 
 @dataclass
@@ -486,16 +490,14 @@ def _server_payload_to_python(payload):
             ],
         )
     elif payload_type == _lib.QLCP_PT_DATA:
+        # Streaming hot path: walk the C readings once rather than re-resolving the payload for every field
+        data = payload_data.data
         return DataPacket(
-            sequence=payload_data.data.header.sequence,
-            timestamp=payload_data.data.header.timestamp,
+            sequence=data.header.sequence,
+            timestamp=data.header.timestamp,
             readings=[
-                SensorReading(
-                    sensor_id=payload_data.data.sensor_data[i].sensor_id,
-                    value=payload_data.data.sensor_data[i].value,
-                    unit=_unit_cache[payload_data.data.sensor_data[i].unit],
-                )
-                for i in range(payload_data.data.sensor_count)
+                SensorReading(sensor_id=r.sensor_id, value=r.value, unit=_unit_cache[r.unit])
+                for r in data.sensor_data[0:data.sensor_count]
             ],
         )
     elif payload_type == _lib.QLCP_PT_CONFIG:
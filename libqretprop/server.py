@@ -45,7 +45,7 @@ async def main(noDiscovery: bool = False,
     ml.initLogger(redisClient)
     ml.slog(f"Starting server (version: {libqretprop.__version__})...")
 
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     daemons: dict[str, asyncio.Task[None]] = {}
 
     # Fire up the FastAPI app and add it as a daemon task
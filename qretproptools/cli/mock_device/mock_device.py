@@ -45,6 +45,8 @@ from libqretprop.protocol import (
 
 import contextlib
 
+SSDP_SEARCH_TARGET = b"urn:qretprop:espdevice:1"
+
 
 class MockSensorDevice:
     """Simulates an ESP32 sensor monitor device."""
@@ -238,16 +240,16 @@ class MockSensorDevice:
 
         self.ssdp_sock.setblocking(False)
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         self.print_status("Waiting for SSDP discovery broadcast...", "INFO")
 
         while True:
             try:
                 data, addr = await loop.sock_recvfrom(self.ssdp_sock, 1024)
-                message = data.decode("utf-8", errors="ignore")
 
-                if "M-SEARCH" in message and "urn:qretprop:espdevice:1" in message:
+                # Match on the raw bytes; the search target rejects other SSDP traffic on the LAN in a single scan
+                if SSDP_SEARCH_TARGET in data and data.startswith(b"M-SEARCH"):
                     self.print_status(f"Received discovery from {addr[0]}", "SUCCESS")
 
                     if self.server_ip is None:
@@ -271,7 +273,7 @@ class MockSensorDevice:
         self.print_status(f"Connecting to server at {self.server_ip}:{self.server_port}", "INFO")
 
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.setblocking(False)
 
@@ -292,14 +294,14 @@ class MockSensorDevice:
         packet = ConfigPacket.create(config_json)
         encoded_packet = packet.encode()
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.sock_sendall(self.sock, encoded_packet)
 
         self.print_status(f"Sent CONFIG ({len(encoded_packet)} bytes)", "SUCCESS")
 
     async def handle_commands(self):
         """Listen for and handle commands from server using LENGTH-based framing."""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         buffer = b""
 
         self.print_status("Listening for commands...", "INFO")
@@ -390,7 +392,7 @@ class MockSensorDevice:
         state = packet.command_state
 
         control_names = list(self.config["controls"].keys())
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         if command_id < len(control_names):
             control_name = control_names[command_id]
@@ -416,7 +418,7 @@ class MockSensorDevice:
 
         self.print_status(f"Starting stream at {self.stream_frequency} Hz", "SUCCESS")
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         ack = AckPacket.create(PacketType.STREAM_START, packet.sequence)
         ack.timestamp = self._get_adjusted_ts()
         await loop.sock_sendall(self.sock, ack.encode())
@@ -433,7 +435,7 @@ class MockSensorDevice:
             self.stream_task.cancel()
             self.stream_task = None
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         seq = packet.sequence if packet else 0
         ack = AckPacket.create(PacketType.STREAM_STOP, seq)
         ack.timestamp = self._get_adjusted_ts()
@@ -477,7 +479,7 @@ class MockSensorDevice:
         packet = DataPacket.create(readings)
         packet.timestamp = self._get_adjusted_ts()
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         # Send data over UDP for performance
         await loop.sock_sendto(self.udp_sock, packet.encode(), (self.server_ip, self.server_udp_port))
@@ -489,7 +491,7 @@ class MockSensorDevice:
         self.print_status("Sending single reading", "INFO")
         await self.send_sensor_data()
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         seq = request_packet.sequence if request_packet else 0
         ack = AckPacket.create(PacketType.GET_SINGLE, seq)
         ack.timestamp = self._get_adjusted_ts()
@@ -506,7 +508,7 @@ class MockSensorDevice:
         status = StatusPacket.create(DeviceStatus.ACTIVE, control_states=control_states)
         status.timestamp = self._get_adjusted_ts()
 
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         await loop.sock_sendall(self.sock, status.encode())
 
         self.print_status("Sent STATUS: ACTIVE", "INFO")
@@ -4,6 +4,12 @@ import asyncio
 from libqretprop import server
 
 
+try:
+    import uvloop
+except ImportError:  # Not installed on Windows; the default asyncio loop is used instead
+    uvloop = None
+
+
 def parseArgs() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Start the QRET server.")
@@ -20,7 +26,10 @@ def parseArgs() -> argparse.Namespace:
 def main() -> None:
     """Start the QRET server."""
     args = parseArgs()
-    asyncio.run(server.main(
+
+    # uvloop replaces the selector event loop with libuv, speeding up every socket operation on the device connections
+    run = uvloop.run if uvloop is not None else asyncio.run
+    run(server.main(
         noDiscovery=args.no_discovery,
     ))
 